@@ -4,6 +4,8 @@ import qrcode
 from PIL import Image, ImageDraw, ImageFont
 import os
 
+from omr_grader.resources import marker_path
+
 # === Configuration ===
 config = {
     "canvas_size": (850, 1100),
@@ -28,10 +30,10 @@ config = {
         "size": 100
     },
     "markers": {
-        "top_left": "markers/top_left.png",
-        "top_right": "markers/top_right.png",
-        "bottom_left": "markers/bottom_left.png",
-        "bottom_right": "markers/bottom_right.png"
+        "top_left": marker_path("top_left"),
+        "top_right": marker_path("top_right"),
+        "bottom_left": marker_path("bottom_left"),
+        "bottom_right": marker_path("bottom_right")
     },
     "bubble_section": {
         "num_items": 60,
@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from omr_grader import CascadeStats, grade_cascade
+from omr_grader.profiles import load_profile
+
+logger = logging.getLogger(__name__)
+
+# === Configuration ===
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+RESULTS_FILE = "results.jsonl"  # one line per graded file, doubles as the resume ledger
+POLL_SECONDS = 2.0
+SETTLE_SECONDS = 2.0  # a file must be unchanged this long before it is graded
+QUEUE_SIZE = 8
+MAX_ATTEMPTS = 3  # grading errors retried per file before giving up until restart
+PROFILE = "default"  # parameter profile name or path, see omr_grader/profile_data
+
+
+def ledger_key(name, st):
+    """Identifies one version of a file, so a rescan saved under an old name is graded again."""
+    return name, st.st_size, st.st_mtime_ns
+
+
+def grade_file(path, key, output_dir, params, stats=None):
+    """Grade one scanned sheet and save its annotated copy. Runs in the executor."""
+    started = time.perf_counter()
+    image = cv2.imread(path)
+    if image is None:
+        raise IOError(f"Cannot read image: {path}")
+
+    cascade = grade_cascade(image, stats=stats, **params)
+    result = cascade.result
+
+    if result.answers == [-1]:
+        status = "failed"
+    elif cascade.uncertain:
+        status = "review"
+    else:
+        status = "ok"
+
+    name, size, mtime_ns = key
+    graded_path = os.path.join(
+        output_dir, f"graded_{os.path.splitext(name)[0]}_{mtime_ns}.png")
+    cv2.imwrite(graded_path, result.paper)
+    return {
+        "file": name,
+        "size": size,
+        "mtime_ns": mtime_ns,
+        "status": status,
+        "method": result.method,
+        "tier": cascade.tier,
+        "uncertain": [i + 1 for i in cascade.uncertain],  # item numbers to check by hand
+        # items re-read by a later tier, redrawn in another color on the graded image
+        "escalated": {i + 1: tier for i, tier in enumerate(cascade.item_tiers)
+                      if tier != cascade.base_tier},
+        "answers": result.answers,
+        "codes": result.codes,
+        "graded_image": graded_path,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+class ResultSink:
+    """Appends one JSON line per graded file; the same file tells a restart what is done.
+
+    Files are identified by name, size and mtime. Lines for errors are
+    not counted as done, so a restart retries those files.
+    """
+
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, RESULTS_FILE)
+
+    def processed(self):
+        done = set()
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    if entry["status"] != "error":
+                        done.add((entry["file"], entry["size"], entry["mtime_ns"]))
+                except (ValueError, KeyError):
+                    continue  # partial line from an interrupted write
+        return done
+
+    def write(self, result):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class HotFolderWatcher:
+    """Grades image files as scanners drop them into ``watch_dir``.
+
+    A file is queued once its size and mtime have stopped changing for
+    ``settle_seconds``. The queue is bounded, so the scanner blocks
+    instead of loading a backlog into memory; at most ``queue_size``
+    paths wait and ``workers`` images are decoded at any time.
+    """
+
+    def __init__(self, watch_dir, output_dir, workers=None, queue_size=QUEUE_SIZE,
+                 poll_seconds=POLL_SECONDS, settle_seconds=SETTLE_SECONDS, profile=PROFILE):
+        self.watch_dir = watch_dir
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        self.params = load_profile(profile)
+        if os.path.abspath(watch_dir) == os.path.abspath(output_dir):
+            raise ValueError("output_dir must differ from watch_dir")
+        os.makedirs(output_dir, exist_ok=True)
+        self.sink = ResultSink(output_dir)
+        self.done = self.sink.processed()
+        self.graded_names = {name for name, _, _ in self.done}
+        self.in_flight = set()
+        self.attempts = {}  # ledger key -> failed attempts in this run
+        self.stats = CascadeStats()
+        self._last_seen = {}  # name -> (size, mtime) for files still being written
+
+    def _ready(self, entry, now, seen):
+        """True once a file has stopped growing; records it in ``seen`` until then."""
+        try:
+            st = entry.stat()
+        except FileNotFoundError:
+            return False
+        signature = (st.st_size, st.st_mtime)
+        previous = self._last_seen.get(entry.name)
+        seen[entry.name] = signature
+        return (previous == signature and st.st_size > 0
+                and now - st.st_mtime >= self.settle_seconds)
+
+    @staticmethod
+    async def _put(queue, item, stop):
+        """Queue ``item`` unless ``stop`` is set first; returns whether it was queued."""
+        put = asyncio.ensure_future(queue.put(item))
+        stopped = asyncio.ensure_future(stop.wait())
+        await asyncio.wait({put, stopped}, return_when=asyncio.FIRST_COMPLETED)
+        stopped.cancel()
+        if put.done():
+            return True
+        put.cancel()
+        return False
+
+    async def _scan(self, queue, stop):
+        while not stop.is_set():
+            now = time.time()
+            seen = {}
+            with os.scandir(self.watch_dir) as entries:
+                for entry in entries:
+                    if stop.is_set():
+                        break  # leave the rest of a large dump for the next run
+                    name = entry.name
+                    if (not name.lower().endswith(IMAGE_EXTENSIONS) or not entry.is_file()
+                            or name in self.in_flight):
+                        continue
+                    try:
+                        key = ledger_key(name, entry.stat())
+                    except FileNotFoundError:
+                        continue
+                    if key in self.done or self.attempts.get(key, 0) >= MAX_ATTEMPTS:
+                        continue
+                    if not self._ready(entry, now, seen):
+                        continue
+                    del seen[name]
+                    if name in self.graded_names and key not in self.attempts:
+                        logger.info(f"{name}: changed since it was graded, grading again")
+                    self.in_flight.add(name)
+                    # blocks while the workers are behind
+                    if not await self._put(queue, (entry.path, key), stop):
+                        self.in_flight.discard(name)
+                        break
+            self._last_seen = seen  # forget files that were removed before settling
+            try:
+                await asyncio.wait_for(stop.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _grade(self, queue, executor):
+        loop = asyncio.get_running_loop()
+        while True:
+            path, key = await queue.get()
+            name, size, mtime_ns = key
+            try:
+                result = await loop.run_in_executor(
+                    executor, grade_file, path, key, self.output_dir, self.params, self.stats)
+            except Exception as e:
+                result = {"file": name, "size": size, "mtime_ns": mtime_ns,
+                          "status": "error", "error": str(e)}
+                self.attempts[key] = self.attempts.get(key, 0) + 1
+                if self.attempts[key] < MAX_ATTEMPTS:
+                    logger.warning(f"{name}: {e} (attempt {self.attempts[key]}, will retry)")
+                else:
+                    logger.error(f"{name}: {e} (giving up after {MAX_ATTEMPTS} attempts "
+                                 f"until restart)")
+            else:
+                logger.info(f"{name}: {result['status']} ({result['tier']}, {result['seconds']}s)")
+                self.done.add(key)
+                self.graded_names.add(name)
+                self.attempts.pop(key, None)
+            self.sink.write(result)
+            self.in_flight.discard(name)
+            queue.task_done()
+
+    async def run(self, stop=None):
+        stop = stop or asyncio.Event()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        logger.info(f"Watching {self.watch_dir} ({len(self.done)} file(s) already graded)")
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            graders = [asyncio.create_task(self._grade(queue, executor))
+                       for _ in range(self.workers)]
+            try:
+                await self._scan(queue, stop)
+                await queue.join()
+            finally:
+                for task in graders:
+                    task.cancel()
+                await asyncio.gather(*graders, return_exceptions=True)
+                if self.stats.sheets:
+                    logger.info(f"Escalation tiers:\n{self.stats.report()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Grade answer sheets as they appear in a folder.")
+    parser.add_argument("watch_dir")
+    parser.add_argument("--output-dir", default=None,
+                        help="defaults to <watch_dir>/graded")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    parser.add_argument("--poll", type=float, default=POLL_SECONDS)
+    parser.add_argument("--settle", type=float, default=SETTLE_SECONDS)
+    parser.add_argument("--profile", default=PROFILE,
+                        help="parameter profile name or JSON path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    output_dir = args.output_dir or os.path.join(args.watch_dir, "graded")
+    watcher = HotFolderWatcher(args.watch_dir, output_dir, args.workers,
+                               args.queue_size, args.poll, args.settle, args.profile)
+    try:
+        asyncio.run(watcher.run())
+    except KeyboardInterrupt:
+        logger.info("Stopped.")
+
+
+if __name__ == "__main__":
+    main()
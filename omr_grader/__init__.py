@@ -0,0 +1,40 @@
+"""Optical mark recognition for multiple choice answer sheets.
+
+Submodules are imported on first attribute access, so ``import
+omr_grader`` stays cheap and has no side effects; marker templates are
+loaded the first time they are needed.
+"""
+import importlib
+
+_EXPORTS = {
+    "grade_image": "pipeline",
+    "grade_file": "pipeline",
+    "GradeResult": "pipeline",
+    "ENHANCE_PARAMS": "pipeline",
+    "GRADE_PARAMS": "pipeline",
+    "grade_cascade": "cascade",
+    "CascadeStats": "cascade",
+    "image_enhancer": "enhance",
+    "transform_paper_image": "transform",
+    "ProcessPage": "grade",
+    "FindCorners": "grade",
+    "detect_qr_code": "qr",
+    "load_marker": "resources",
+    "marker_path": "resources",
+    "load_profile": "profiles",
+    "init_worker": "worker",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
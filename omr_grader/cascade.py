@@ -0,0 +1,187 @@
+"""Tiered grading: a cheap default pass, with retries only for hard sheets.
+
+Each tier is a set of ``grade_image`` overrides, ordered from cheapest
+to most expensive. A sheet moves to the next tier when it cannot be
+read (markers not found, or no bubble on the sheet is filled in), or
+when some items have a filled-in bubble whose runner-up is within the
+grading ``sensitivity`` (``CONFIDENCE_MARGIN`` unless a profile sets
+one), i.e. items that read as '?'. A bubble counts as filled in when it is
+``FILL_CONTRAST`` darker than the sheet's empty bubbles (the median
+runner-up), so exposure does not matter; items without a filled bubble
+count as unanswered and never trigger a retry. Only the unclear items are taken
+from a later tier, and only if it reads them as a letter. Escalation
+stops once it has cost ``COST_CAP`` times the default pass.
+"""
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from .grade import DrawAnswer, NUM_COLUMNS, NUM_ITEMS_PER_COLUMN, test_sensitivity_epsilon
+from .pipeline import grade_image
+
+# Tiers keep a bounded working width: at full camera resolution the
+# fixed-size marker templates and the contour step stop working.
+TIERS = [
+    ("default", {}),
+    ("wide_threshold", {"blur_ksize": 7, "block_size": 101, "C": 5}),
+    ("high_resolution", {"target_width": 1600, "blur_ksize": 7, "block_size": 75}),
+    ("wide_search", {"blur_ksize": 7, "block_size": 101, "C": 5,
+                     "marker_scales": (0.6, 0.75, 0.9, 1.0, 1.15, 1.3), "tolerance": 25}),
+]
+
+CONFIDENCE_MARGIN = test_sensitivity_epsilon  # default sensitivity; closer filled items are re-read
+FILL_CONTRAST = 15  # gray levels below the sheet's empty bubbles for a bubble to count as filled
+COST_CAP = 5.0  # stop escalating once a sheet has cost this many default passes
+
+# Color of answers taken from a later tier on the annotated sheet
+ESCALATED_COLOR = (0, 120, 255)
+
+CascadeResult = namedtuple("CascadeResult", [
+    "result",      # GradeResult with the merged answers and margins
+    "tier",        # name of the last tier that was run
+    "base_tier",   # name of the tier the sheet was first read by
+    "uncertain",   # indices of items that still need checking by hand
+    "item_tiers",  # per item, name of the tier its answer came from
+])
+
+
+class CascadeStats:
+    """Counts, per tier, how many sheets it was run on and how many it settled.
+
+    Safe to share between the threads of an executor.
+    """
+
+    def __init__(self, tiers=TIERS):
+        self.names = [name for name, _ in tiers]
+        self.attempts = dict.fromkeys(self.names, 0)
+        self.resolved = dict.fromkeys(self.names, 0)
+        self.items_improved = dict.fromkeys(self.names, 0)
+        self.sheets = 0
+        self.unresolved = 0
+        self._lock = threading.Lock()
+
+    def record(self, tiers_run, items_improved, resolved):
+        with self._lock:
+            self.sheets += 1
+            for name in tiers_run:
+                self.attempts[name] += 1
+            for name, count in items_improved.items():
+                self.items_improved[name] += count
+            if resolved:
+                self.resolved[tiers_run[-1]] += 1
+            else:
+                self.unresolved += 1
+
+    def hit_rates(self):
+        """Fraction of all sheets settled at each tier."""
+        return {name: self.resolved[name] / self.sheets if self.sheets else 0.0
+                for name in self.names}
+
+    def report(self):
+        lines = [f"{self.sheets} sheet(s), {self.unresolved} still uncertain"]
+        for name, rate in self.hit_rates().items():
+            lines.append(f"  {name}: ran {self.attempts[name]}, settled {self.resolved[name]} "
+                         f"({rate:.0%}), items improved {self.items_improved[name]}")
+        return "\n".join(lines)
+
+
+def _found(result):
+    return result.answers != [-1] and result.method != "fallback"
+
+
+def _filled(result):
+    """Per item, whether its darkest bubble is clearly darker than an empty one."""
+    if not result.darkest:
+        return []
+    empty = np.median(np.add(result.darkest, result.margins))  # runner-ups are mostly empty
+    return [d < empty - FILL_CONTRAST for d in result.darkest]
+
+
+def _readable(result):
+    """Markers found and at least one bubble filled in; anything else is a failed read."""
+    return _found(result) and any(_filled(result))
+
+
+def _unclear(result, margin):
+    return [i for i, (m, filled) in enumerate(zip(result.margins, _filled(result)))
+            if filled and m < margin]
+
+
+def _merge(best, result, uncertain, name, item_tiers):
+    """Take uncertain items that ``result`` reads as a letter rather than '?'."""
+    answers = list(best.answers)
+    margins, darkest = list(best.margins), list(best.darkest)
+    improved = 0
+    filled = _filled(result)
+    for i in uncertain:
+        if filled[i] and result.answers[i] != '?':
+            answers[i] = result.answers[i]
+            margins[i] = result.margins[i]
+            darkest[i] = result.darkest[i]
+            item_tiers[i] = name
+            DrawAnswer(best.paper, best.corners, i, answers[i],
+                       color=ESCALATED_COLOR, erase=True)
+            improved += 1
+    return best._replace(answers=answers, margins=margins, darkest=darkest), improved
+
+
+def grade_cascade(image, tiers=TIERS, margin=None, cost_cap=COST_CAP,
+                  stats=None, **params):
+    """Grade ``image``, escalating through ``tiers`` until it is read confidently.
+
+    ``params`` apply to every tier (e.g. a camera's tuned profile) and
+    are overridden by the tier's own settings. Answers taken from a later
+    tier are redrawn in ``ESCALATED_COLOR`` on the annotated sheet. When
+    no tier can read the sheet, answers are [-1] and every item is
+    uncertain. ``margin`` defaults to the ``sensitivity`` in ``params``,
+    so exactly the filled items that read as '?' are escalated.
+    """
+    if margin is None:
+        margin = params.get("sensitivity", CONFIDENCE_MARGIN)
+    started = time.perf_counter()
+    budget = None
+    best = None
+    base_tier = None
+    found = None  # first read with markers, kept in case nothing is filled in
+    uncertain = []
+    tiers_run = []
+    item_tiers = []
+    improved = {}
+    for name, overrides in tiers:
+        if budget is not None and time.perf_counter() - started >= budget:
+            break
+        tiers_run.append(name)
+        result = grade_image(image, **dict(params, **overrides))
+        if budget is None and cost_cap is not None:
+            budget = cost_cap * (time.perf_counter() - started)
+
+        if best is None:
+            if not _readable(result):
+                if found is None and _found(result):
+                    found = (name, result)
+                continue  # try a more thorough tier on the whole sheet
+            best = result
+            base_tier = name
+            item_tiers = [name] * len(result.answers)
+        elif _found(result):
+            best, improved[name] = _merge(best, result, uncertain, name, item_tiers)
+        uncertain = _unclear(best, margin)
+        if not uncertain:
+            break
+
+    n_items = NUM_COLUMNS * NUM_ITEMS_PER_COLUMN
+    if best is None and found is not None:
+        # Markers found but nothing filled in: a blank sheet or a bad read.
+        base_tier, best = found
+        item_tiers = [base_tier] * len(best.answers)
+        uncertain = list(range(n_items))
+    elif best is None:
+        best = result._replace(answers=[-1], margins=[], darkest=[])
+        uncertain = list(range(n_items))
+
+    resolved = best.answers != [-1] and not uncertain
+    if stats is not None:
+        stats.record(tiers_run, improved, resolved)
+    return CascadeResult(best, tiers_run[-1], base_tier, uncertain, item_tiers)
@@ -0,0 +1,34 @@
+import cv2
+import numpy as np
+
+
+def smooth_gray(img, blur_ksize, target_width=1080):
+    """Resize, grayscale and blur: the stages that do not depend on the threshold."""
+    # Resize image to target_width while keeping aspect ratio
+    # (None keeps the full resolution)
+    if target_width is not None:
+        height, width = img.shape[:2]
+        scale_ratio = target_width / width
+        target_height = int(height * scale_ratio)
+        img = cv2.resize(img, (target_width, target_height),
+                         interpolation=cv2.INTER_AREA)
+
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return cv2.GaussianBlur(gray, (blur_ksize, blur_ksize), 0)
+
+
+def binarize(blurred, block_size, C, morph_kernel_size):
+    """Adaptive threshold and morphological opening of a ``smooth_gray`` image."""
+    adaptive_thresh = cv2.adaptiveThreshold(
+        blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY, block_size, C
+    )
+    kernel = np.ones((morph_kernel_size, morph_kernel_size), np.uint8)
+    enhanced = cv2.morphologyEx(adaptive_thresh, cv2.MORPH_OPEN, kernel)
+    return cv2.cvtColor(enhanced, cv2.COLOR_GRAY2BGR)
+
+
+def image_enhancer(img, blur_ksize, block_size, C, morph_kernel_size,
+                   target_width=1080):
+    blurred = smooth_gray(img, blur_ksize, target_width)
+    return binarize(blurred, block_size, C, morph_kernel_size)
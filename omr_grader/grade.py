@@ -1,9 +1,10 @@
+from collections import namedtuple
+
 import cv2
 import numpy as np
-from PIL import Image
-from pyzbar import pyzbar
 
-from qr_code import detect_qr_code
+from .qr import detect_qr_code
+from .resources import load_marker
 
 # === Constants ===
 epsilon = 10  # image error sensitivity
@@ -15,13 +16,8 @@ scaling = [850.0, 1202.0]
 radius = 10.0 / scaling[0]
 spacing = [35.0 / scaling[0], 32.0 / scaling[1]]
 
-# Marker tags
-tags = [
-    cv2.imread("markers/top_left.png", cv2.IMREAD_GRAYSCALE),
-    cv2.imread("markers/top_right.png", cv2.IMREAD_GRAYSCALE),
-    cv2.imread("markers/bottom_left.png", cv2.IMREAD_GRAYSCALE),
-    cv2.imread("markers/bottom_right.png", cv2.IMREAD_GRAYSCALE)
-]
+# Marker tags, in the order FindCorners reports them
+TAG_NAMES = ["top_left", "top_right", "bottom_left", "bottom_right"]
 
 # Sheet Configuration
 NUM_COLUMNS = 2
@@ -50,14 +46,54 @@ ANSWER_FONT_THICKNESS = 2
 # Variable aliasing to make it compatible
 columns = COLUMN_ORIGINS
 
+PageDetails = namedtuple("PageDetails", [
+    "margins",  # per item, darkness gap between chosen bubble and runner-up
+    "darkest",  # per item, mean gray level of the darkest bubble (0 = solid ink)
+    "corners",  # marker corners found by FindCorners, or None
+])
 
-def ProcessPage(paper):
+
+def AnswerTextPosition(corners, index):
+    """Where the answer letter of item ``index`` (0-based, column by column) is drawn."""
+    k, i = divmod(index, NUM_ITEMS_PER_COLUMN)
+    dimensions = [corners[1][0] - corners[0][0], corners[2][1] - corners[0][1]]
+    y_center = (columns[k][1] + i * ITEM_SPACING_Y) * dimensions[1] + corners[0][1]
+    x_text = int((columns[k][0] - radius * 10) * dimensions[0] + corners[0][0])
+    y_text = int(y_center + 0.5 * radius * dimensions[1])
+    return x_text, y_text
+
+
+def DrawAnswer(paper, corners, index, answer, color=(0, 150, 0), erase=False):
+    """Write an item's answer letter, optionally blanking the letter drawn there before."""
+    x_text, y_text = AnswerTextPosition(corners, index)
+    if erase:
+        (w, h), baseline = cv2.getTextSize("W", cv2.FONT_HERSHEY_SIMPLEX,
+                                           ANSWER_FONT_SCALE, ANSWER_FONT_THICKNESS)
+        cv2.rectangle(paper, (x_text - 1, y_text - h - 1),
+                      (x_text + w + 1, y_text + baseline), (255, 255, 255), -1)
+    cv2.putText(paper, answer, (x_text, y_text), cv2.FONT_HERSHEY_SIMPLEX,
+                ANSWER_FONT_SCALE, color, ANSWER_FONT_THICKNESS)
+
+
+def ProcessPage(paper, sensitivity=test_sensitivity_epsilon, tolerance=epsilon,
+                return_details=False, decode_qr=True):
+    """Read every item on a warped sheet.
+
+    Returns ``(answers, paper, codes)``; with ``return_details`` a fourth
+    value holds the ``PageDetails`` of the read. Items whose margin is
+    below ``sensitivity`` read as '?'. With ``decode_qr=False`` the QR
+    code is skipped and codes is [-1].
+    """
     answers = []
+    margins = []
+    darkest = []
     gray_paper = cv2.cvtColor(paper, cv2.COLOR_BGR2GRAY)
 
     # Locate markers
-    corners = FindCorners(paper)
+    corners = FindCorners(paper, tolerance)
     if corners is None:
+        if return_details:
+            return [-1], paper, [-1], PageDetails([], [], None)
         return [-1], paper, [-1]
 
     dimensions = [corners[1][0] - corners[0][0], corners[2][1] - corners[0][1]]
@@ -91,31 +127,31 @@ def ProcessPage(paper):
             # Double bubble detection
             means[min_arg] = 255
             second_min = np.min(means)
-            if second_min - min_val < test_sensitivity_epsilon:
+            margins.append(float(second_min - min_val))
+            darkest.append(float(min_val))
+            if second_min - min_val < sensitivity:
                 min_arg = NUM_CHOICES  # '?'
 
             # Annotate and save
-            x_text = int((columns[k][0] - radius * 10) *
-                         dimensions[0] + corners[0][0])
-            y_text = int(y_center + 0.5 * radius * dimensions[1])
-            cv2.putText(paper, answer_choices[min_arg], (x_text, y_text),
-                        cv2.FONT_HERSHEY_SIMPLEX, ANSWER_FONT_SCALE, (0, 150, 0), ANSWER_FONT_THICKNESS)
+            DrawAnswer(paper, corners, len(answers), answer_choices[min_arg])
             answers.append(answer_choices[min_arg])
 
-    codes = detect_qr_code(gray_paper, paper, dimensions)
+    codes = detect_qr_code(gray_paper, paper, dimensions) if decode_qr else [-1]
 
+    if return_details:
+        return answers, paper, codes, PageDetails(margins, darkest, corners)
     return answers, paper, codes
 
 
-def FindCorners(paper):
+def FindCorners(paper, tolerance=epsilon):
     gray_paper = cv2.cvtColor(paper, cv2.COLOR_BGR2GRAY)
     ratio = len(paper[0]) / 816.0
     if ratio == 0:
         return -1
 
     corners = []
-    for tag in tags:
-        tag = cv2.resize(tag, (0, 0), fx=ratio, fy=ratio)
+    for name in TAG_NAMES:
+        tag = cv2.resize(load_marker(name), (0, 0), fx=ratio, fy=ratio)
         conv = cv2.filter2D(np.float32(cv2.bitwise_not(
             gray_paper)), -1, np.float32(cv2.bitwise_not(tag)))
         max_pos = np.unravel_index(conv.argmax(), conv.shape)
@@ -129,10 +165,10 @@ def FindCorners(paper):
                        corner[1] + int(ratio * 25)),
                       (0, 255, 0), 2)
 
-    if corners[0][0] - corners[2][0] > epsilon or \
-       corners[1][0] - corners[3][0] > epsilon or \
-       corners[0][1] - corners[1][1] > epsilon or \
-       corners[2][1] - corners[3][1] > epsilon:
+    if corners[0][0] - corners[2][0] > tolerance or \
+       corners[1][0] - corners[3][0] > tolerance or \
+       corners[0][1] - corners[1][1] > tolerance or \
+       corners[2][1] - corners[3][1] > tolerance:
         return None
 
     return corners
@@ -0,0 +1,66 @@
+from collections import namedtuple
+
+import cv2
+
+from .enhance import image_enhancer
+from .grade import ProcessPage, epsilon, test_sensitivity_epsilon
+from .transform import transform_paper_image
+
+# === Default Enhancement Parameters ===
+ENHANCE_PARAMS = {
+    "blur_ksize": 5,
+    "block_size": 51,
+    "C": 9,
+    "morph_kernel_size": 1,
+    "target_width": 1080,
+}
+
+# === Default Marker Search and Grading Parameters ===
+GRADE_PARAMS = {
+    "marker_scales": (1.0,),
+    "sensitivity": test_sensitivity_epsilon,
+    "tolerance": epsilon,
+}
+
+GradeResult = namedtuple("GradeResult", [
+    "answers",        # list of 'A'..'E' / '?', or [-1] when the markers were not found
+    "codes",          # decoded QR strings, or [-1]
+    "paper",          # warped and annotated 850x1202 sheet
+    "enhanced",       # enhanced input image
+    "preview",        # enhanced image with detected markers drawn on it
+    "contour",        # largest 4-point contour, or None
+    "method",         # "dual_stage" or "fallback"
+    "marker_points",  # detected marker centers in the preview image
+    "margins",        # per item, darkness gap between chosen bubble and runner-up
+    "darkest",        # per item, mean gray level of the darkest bubble
+    "corners",        # marker corners on the paper, or None
+])
+
+
+def grade_image(image, **params):
+    """Run enhancement, perspective transform and grading on one BGR image.
+
+    Keyword arguments override ``ENHANCE_PARAMS`` and ``GRADE_PARAMS``.
+    The input image is not modified.
+    """
+    unknown = set(params) - set(ENHANCE_PARAMS) - set(GRADE_PARAMS)
+    if unknown:
+        raise TypeError(f"Unknown pipeline parameter(s): {', '.join(sorted(unknown))}")
+    enhance = {k: params.get(k, v) for k, v in ENHANCE_PARAMS.items()}
+    grade = {k: params.get(k, v) for k, v in GRADE_PARAMS.items()}
+
+    enhanced = image_enhancer(image, **enhance)
+    preview, paper, contour, method, marker_points = transform_paper_image(
+        enhanced, grade["marker_scales"])
+    answers, paper, codes, details = ProcessPage(
+        paper, grade["sensitivity"], grade["tolerance"], return_details=True)
+    return GradeResult(answers, codes, paper, enhanced, preview, contour,
+                       method, marker_points, *details)
+
+
+def grade_file(path, **params):
+    """Read an image from disk and grade it."""
+    image = cv2.imread(path)
+    if image is None:
+        raise IOError(f"Cannot read image: {path}")
+    return grade_image(image, **params)
@@ -0,0 +1,54 @@
+"""Named parameter profiles for ``grade_image``.
+
+A profile is a JSON file with a ``params`` object (any keys of
+``ENHANCE_PARAMS`` and ``GRADE_PARAMS``) and optional metadata written
+by the tuner. Profiles shipped with the package live in
+``omr_grader/profile_data``; a path to any other JSON file also works.
+"""
+import json
+import os
+
+from .pipeline import ENHANCE_PARAMS, GRADE_PARAMS
+
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profile_data")
+
+
+def profile_path(name):
+    """Resolve a profile name or path to a JSON file."""
+    if os.path.isfile(name):
+        return name
+    return os.path.join(PROFILE_DIR, f"{name}.json")
+
+
+def load_profile(name):
+    """Return the ``grade_image`` keyword arguments stored in a profile."""
+    path = profile_path(name)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Parameter profile not found: {name}")
+    with open(path, encoding="utf-8") as f:
+        params = json.load(f)["params"]
+
+    unknown = set(params) - set(ENHANCE_PARAMS) - set(GRADE_PARAMS)
+    if unknown:
+        raise ValueError(f"{path}: unknown parameter(s) {', '.join(sorted(unknown))}")
+    if "marker_scales" in params:
+        params["marker_scales"] = tuple(params["marker_scales"])
+    return params
+
+
+def save_profile(name, params, metadata=None, directory=PROFILE_DIR, overwrite=False):
+    """Write ``params`` (and tuning metadata) as ``<directory>/<name>.json``.
+
+    Raises ``FileExistsError`` if that profile exists, unless ``overwrite``.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.json")
+    if os.path.exists(path) and not overwrite:
+        raise FileExistsError(f"Parameter profile already exists: {path}")
+    profile = {"params": params}
+    if metadata:
+        profile["metadata"] = metadata
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+        f.write("\n")
+    return path
@@ -0,0 +1,29 @@
+import os
+from functools import lru_cache
+
+import cv2
+
+MARKER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "markers")
+MARKER_NAMES = ("top_left", "top_right", "bottom_left", "bottom_right")
+
+
+def marker_path(name):
+    """Absolute path of a marker PNG, independent of the working directory."""
+    return os.path.join(MARKER_DIR, f"{name}.png")
+
+
+@lru_cache(maxsize=None)
+def load_marker(name):
+    """Read a grayscale marker template once per process."""
+    path = marker_path(name)
+    template = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if template is None:
+        raise FileNotFoundError(f"Marker template not found: {path}")
+    template.flags.writeable = False  # shared by every caller
+    return template
+
+
+def preload():
+    """Load every resource up front, e.g. in a pool initializer."""
+    for name in MARKER_NAMES:
+        load_marker(name)
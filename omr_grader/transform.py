@@ -1,12 +1,18 @@
+import logging
+
 import cv2
 import numpy as np
 
-# Marker templates (ensure path is correct)
-marker_paths = [
-    "markers/top_left.png",
-    "markers/top_right.png",
-    "markers/bottom_right.png",
-    "markers/bottom_left.png"
+from .resources import load_marker
+
+logger = logging.getLogger(__name__)
+
+# Marker templates, in the order of EXPECTED_MARKER_POSITIONS
+marker_names = [
+    "top_left",
+    "top_right",
+    "bottom_right",
+    "bottom_left"
 ]
 
 # Expected output positions for 850x1202 A4 layout
@@ -18,17 +24,21 @@ EXPECTED_MARKER_POSITIONS = np.float32([
 ])
 
 
-def detect_marker_positions(image_gray):
-    """Find marker centers via template matching."""
+def detect_marker_positions(image_gray, scales=(1.0,)):
+    """Find marker centers via template matching, keeping the best-scoring scale."""
     positions = []
-    for path in marker_paths:
-        template = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
-        if template is None:
-            raise FileNotFoundError(f"Marker template not found: {path}")
-        result = cv2.matchTemplate(image_gray, template, cv2.TM_CCOEFF_NORMED)
-        _, _, _, max_loc = cv2.minMaxLoc(result)
-        w, h = template.shape[::-1]
-        center = (max_loc[0] + w // 2, max_loc[1] + h // 2)
+    for name in marker_names:
+        best_score, center = -np.inf, None
+        for scale in scales:
+            template = load_marker(name)
+            if scale != 1.0:
+                template = cv2.resize(template, (0, 0), fx=scale, fy=scale)
+            result = cv2.matchTemplate(image_gray, template, cv2.TM_CCOEFF_NORMED)
+            _, max_val, _, max_loc = cv2.minMaxLoc(result)
+            if max_val > best_score:
+                w, h = template.shape[::-1]
+                best_score = max_val
+                center = (max_loc[0] + w // 2, max_loc[1] + h // 2)
         positions.append(center)
     return np.float32(positions)
 
@@ -64,7 +74,7 @@ def try_contour_transform(image):
     return None, None
 
 
-def transform_paper_image(image):
+def transform_paper_image(image, marker_scales=(1.0,)):
     """Dual-stage transformation: contour first, then marker alignment."""
     original_image = image.copy()
 
@@ -75,7 +85,7 @@ def transform_paper_image(image):
     # === Stage 2: Marker-based precision alignment ===
     try:
         gray = cv2.cvtColor(base_for_marker, cv2.COLOR_BGR2GRAY)
-        actual_positions = detect_marker_positions(gray)
+        actual_positions = detect_marker_positions(gray, marker_scales)
         M = cv2.getPerspectiveTransform(
             actual_positions, EXPECTED_MARKER_POSITIONS)
         final_warped = cv2.warpPerspective(base_for_marker, M, (850, 1202))
@@ -89,6 +99,6 @@ def transform_paper_image(image):
         return preview_img, final_warped, largest_contour, "dual_stage", actual_positions.tolist()
 
     except Exception as e:
-        print(f"[Marker Transform Error] {e}")
+        logger.warning(f"Marker transform failed: {e}")
         blank = np.ones((1202, 850, 3), dtype=np.uint8) * 255
         return base_for_marker, blank, largest_contour, "fallback", []
@@ -0,0 +1,320 @@
+"""Search enhancement and grading parameters over a set of sample sheets.
+
+The sample folder holds photos of filled-in sheets and an ``answers.json``
+mapping each file name to its correct answers (a string such as
+``"ABDCE..."`` or a list). Every trial is scored on item accuracy and on
+seconds per sheet, and the fastest trial that reaches the target
+accuracy is saved as a named profile for ``load_profile``. Timings taken
+while the workers run side by side are noisy, so the fastest passing
+trials are timed again one after another before one is picked, and
+trials within ``COST_TOLERANCE`` of the fastest count as equally fast::
+
+    python -m omr_grader.tuning samples/room_12 --name room_12 --target 0.98
+
+Trials share their intermediate stages. The resize/blur stage is computed
+once per image for every combination of threshold settings, the warped
+sheet once for every corner tolerance, and the bubble darkness once for
+every sensitivity, which is applied afterwards from the item margins.
+Existing profiles are only overwritten with ``--force``.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from functools import lru_cache
+
+import cv2
+
+from .enhance import binarize, smooth_gray
+from .grade import ProcessPage
+from .profiles import PROFILE_DIR, save_profile
+from .transform import transform_paper_image
+from .worker import init_worker
+
+logger = logging.getLogger(__name__)
+
+ANSWER_KEY = "answers.json"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+TARGET_ACCURACY = 0.98
+SMOOTH_CACHE_SIZE = 64  # resized, blurred samples kept per worker process (~2 MB each)
+RETIME_CANDIDATES = 8  # fastest passing trials timed again without other load
+RETIME_REPEATS = 3  # best of this many sequential runs per candidate
+COST_TOLERANCE = 0.05  # trials within this fraction of the fastest count as equally fast
+
+SEARCH_SPACE = {
+    "target_width": [800, 1080],
+    "blur_ksize": [3, 5, 7],
+    "block_size": [15, 31, 51, 71],
+    "C": [2, 5, 9, 12],
+    "morph_kernel_size": [1, 2, 3],
+    "tolerance": [10, 20],
+    "sensitivity": [15, 20, 30, 40],
+}
+
+# Parameters that change the enhanced image, in the order trials are grouped by.
+ENHANCE_KEYS = ["target_width", "blur_ksize", "block_size", "C", "morph_kernel_size"]
+
+
+def load_samples(sample_dir):
+    """Return ``[(path, answers)]`` for every image listed in the answer key."""
+    key_path = os.path.join(sample_dir, ANSWER_KEY)
+    if not os.path.isfile(key_path):
+        raise FileNotFoundError(f"Answer key not found: {key_path}")
+    with open(key_path, encoding="utf-8") as f:
+        key = json.load(f)
+
+    samples = []
+    for name in sorted(os.listdir(sample_dir)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        if name not in key:
+            logger.warning(f"{name}: not in {ANSWER_KEY}, skipped")
+            continue
+        samples.append((os.path.join(sample_dir, name), list(key[name])))
+    if not samples:
+        raise ValueError(f"No sample images with known answers in {sample_dir}")
+    return samples
+
+
+def _load_image(path):
+    image = cv2.imread(path)
+    if image is None:
+        raise IOError(f"Cannot read image: {path}")
+    return image
+
+
+@lru_cache(maxsize=SMOOTH_CACHE_SIZE)
+def _smoothed(path, target_width, blur_ksize):
+    """``smooth_gray`` output for one sample and the seconds it took (reading excluded)."""
+    image = _load_image(path)
+    started = time.perf_counter()
+    blurred = smooth_gray(image, blur_ksize, target_width)
+    return blurred, time.perf_counter() - started
+
+
+def _score(answers, key):
+    if answers == [-1]:
+        return 0
+    return sum(a == k for a, k in zip(answers, key))
+
+
+def evaluate_group(samples, target_width, blur_ksize, variants, tolerances, sensitivities):
+    """Score every trial that shares ``target_width`` and ``blur_ksize``.
+
+    ``variants`` are ``(block_size, C, morph_kernel_size)`` tuples. Runs in
+    a worker process and returns one dict per trial with the total
+    number of correct items and the summed pipeline seconds (QR decoding
+    is left out, as it does not depend on the parameters).
+    """
+    totals = {}
+    for path, key in samples:
+        blurred, smooth_seconds = _smoothed(path, target_width, blur_ksize)
+
+        for block_size, C, morph_kernel_size in variants:
+            started = time.perf_counter()
+            enhanced = binarize(blurred, block_size, C, morph_kernel_size)
+            _, paper, _, _, _ = transform_paper_image(enhanced)
+            enhance_seconds = smooth_seconds + time.perf_counter() - started
+
+            for tolerance in tolerances:
+                started = time.perf_counter()
+                # Sensitivity 0 keeps the darkest bubble for every item; each
+                # trial's sensitivity is applied to the margins below.
+                answers, _, _, details = ProcessPage(
+                    paper.copy(), 0, tolerance, return_details=True, decode_qr=False)
+                seconds = enhance_seconds + time.perf_counter() - started
+
+                for sensitivity in sensitivities:
+                    if answers != [-1]:
+                        graded = [a if m >= sensitivity else '?'
+                                  for a, m in zip(answers, details.margins)]
+                    else:
+                        graded = answers
+                    trial = (block_size, C, morph_kernel_size, tolerance, sensitivity)
+                    correct, total, elapsed = totals.get(trial, (0, 0, 0.0))
+                    totals[trial] = (correct + _score(graded, key),
+                                     total + len(key), elapsed + seconds)
+
+    return [
+        {"params": {"target_width": target_width, "blur_ksize": blur_ksize,
+                    "block_size": trial[0], "C": trial[1], "morph_kernel_size": trial[2],
+                    "tolerance": trial[3], "sensitivity": trial[4]},
+         "correct": correct, "items": total, "seconds": elapsed}
+        for trial, (correct, total, elapsed) in totals.items()
+    ]
+
+
+def time_trial(samples, params, repeats=RETIME_REPEATS):
+    """Seconds per sheet for ``params``, best of ``repeats`` sequential runs."""
+    total = 0.0
+    for path, _ in samples:
+        image = _load_image(path)
+        best = None
+        for _ in range(repeats):
+            started = time.perf_counter()
+            blurred = smooth_gray(image, params["blur_ksize"], params["target_width"])
+            enhanced = binarize(blurred, params["block_size"], params["C"],
+                                params["morph_kernel_size"])
+            _, paper, _, _, _ = transform_paper_image(enhanced)
+            ProcessPage(paper, params["sensitivity"], params["tolerance"], decode_qr=False)
+            seconds = time.perf_counter() - started
+            best = seconds if best is None else min(best, seconds)
+        total += best
+    return total / len(samples)
+
+
+def enhance_trials(search_space=SEARCH_SPACE, trials=None, seed=0):
+    """All enhancement combinations, or a random sample of ``trials`` of them."""
+    if trials is not None and trials < 1:
+        raise ValueError(f"trials must be at least 1, got {trials}")
+    combos = list(itertools.product(*(search_space[k] for k in ENHANCE_KEYS)))
+    if trials is not None and trials < len(combos):
+        combos = random.Random(seed).sample(combos, trials)
+    return combos
+
+
+def run_search(samples, search_space=SEARCH_SPACE, trials=None, workers=None, seed=0):
+    """Evaluate the search space on ``samples`` in parallel; returns scored trials."""
+    workers = workers or os.cpu_count() or 1
+    groups = {}
+    for target_width, blur_ksize, *variant in enhance_trials(search_space, trials, seed):
+        groups.setdefault((target_width, blur_ksize), []).append(tuple(variant))
+    if not groups or not search_space["tolerance"] or not search_space["sensitivity"]:
+        raise ValueError("Search space is empty")
+
+    # Split groups so that every worker gets several tasks; each task
+    # recomputes the shared resize/blur stage once per image.
+    tasks = []
+    chunks_per_group = max(1, -(-4 * workers // len(groups)))
+    for (target_width, blur_ksize), variants in groups.items():
+        size = max(1, -(-len(variants) // chunks_per_group))
+        for i in range(0, len(variants), size):
+            tasks.append((target_width, blur_ksize, variants[i:i + size]))
+
+    n_trials = (sum(len(v) for v in groups.values()) * len(search_space["tolerance"])
+                * len(search_space["sensitivity"]))
+    logger.info(f"{n_trials} trial(s) on {len(samples)} sample(s): "
+                f"{len(tasks)} task(s) over {workers} worker(s)")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        futures = [pool.submit(evaluate_group, samples, target_width, blur_ksize, variants,
+                               search_space["tolerance"], search_space["sensitivity"])
+                   for target_width, blur_ksize, variants in tasks]
+        for done, future in enumerate(as_completed(futures), 1):
+            results.extend(future.result())
+            logger.info(f"Finished task {done}/{len(tasks)}")
+
+    for result in results:
+        result["accuracy"] = result["correct"] / result["items"] if result["items"] else 0.0
+        result["seconds_per_sheet"] = result["seconds"] / len(samples)
+    return results
+
+
+def _param_order(result):
+    return tuple(result["params"][k] for k in sorted(result["params"]))
+
+
+def _cost(result):
+    """Sequential timing where one was taken, else the timing from the search."""
+    return result.get("sequential_seconds_per_sheet", result["seconds_per_sheet"])
+
+
+def pick_fastest(results, target_accuracy=TARGET_ACCURACY, samples=None,
+                 candidates=RETIME_CANDIDATES, tolerance=COST_TOLERANCE):
+    """Fastest trial meeting ``target_accuracy``, else the most accurate one.
+
+    With ``samples``, the passing trials of the ``candidates`` fastest
+    settings are timed again sequentially first (sensitivity does not
+    change the cost, so trials differing only in it share one timing).
+    Trials within ``tolerance`` of the fastest are treated as equally
+    fast and the most accurate of them wins, with the parameter values
+    breaking any remaining tie.
+    """
+    passing = [r for r in results if r["accuracy"] >= target_accuracy]
+    if not passing:
+        return max(results, key=lambda r: (r["accuracy"], -r["seconds_per_sheet"])), False
+
+    passing = sorted(passing, key=lambda r: (r["seconds_per_sheet"], _param_order(r)))
+    timed = {}
+    for result in passing:
+        setting = tuple(result["params"][k] for k in ENHANCE_KEYS + ["tolerance"])
+        if setting not in timed and len(timed) == candidates:
+            continue
+        timed.setdefault(setting, []).append(result)
+    passing = [r for group in timed.values() for r in group]
+    if samples is not None:
+        for done, group in enumerate(timed.values(), 1):
+            seconds = time_trial(samples, group[0]["params"])
+            for result in group:
+                result["sequential_seconds_per_sheet"] = seconds
+            logger.info(f"Re-timed setting {done}/{len(timed)}: {seconds * 1000:.0f}ms/sheet")
+    fastest = min(_cost(r) for r in passing)
+    tied = [r for r in passing if _cost(r) <= fastest * (1 + tolerance)]
+    return min(tied, key=lambda r: (-r["accuracy"], _param_order(r))), True
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Tune enhancement and grading parameters on sample sheets "
+                    "and save the result as a named profile.")
+    parser.add_argument("sample_dir", help=f"folder with sample photos and {ANSWER_KEY}")
+    parser.add_argument("--name", required=True, help="profile name to write")
+    parser.add_argument("--target", type=float, default=TARGET_ACCURACY,
+                        help="required fraction of items read correctly")
+    parser.add_argument("--trials", type=_positive_int, default=None,
+                        help="random search over this many enhancement settings "
+                             "instead of the full grid")
+    parser.add_argument("--workers", type=_positive_int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-dir", default=PROFILE_DIR)
+    parser.add_argument("--force", action="store_true",
+                        help="overwrite an existing profile of the same name")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    # Fail before the search rather than after it
+    path = os.path.join(args.output_dir, f"{args.name}.json")
+    if os.path.exists(path) and not args.force:
+        parser.error(f"profile '{args.name}' already exists at {path}; "
+                     f"pick another --name or pass --force")
+
+    samples = load_samples(args.sample_dir)
+    results = run_search(samples, trials=args.trials, workers=args.workers, seed=args.seed)
+    best, target_met = pick_fastest(results, args.target, samples)
+
+    for result in sorted(results, key=lambda r: (-r["accuracy"], r["seconds_per_sheet"]))[:5]:
+        logger.info(f"accuracy {result['accuracy']:.3f}, "
+                    f"{result['seconds_per_sheet'] * 1000:.0f}ms/sheet: {result['params']}")
+    if not target_met:
+        logger.warning(f"No trial reached accuracy {args.target}; saving the most accurate one.")
+
+    path = save_profile(args.name, best["params"], {
+        "accuracy": round(best["accuracy"], 4),
+        "seconds_per_sheet": round(_cost(best), 4),
+        "target_accuracy": args.target,
+        "target_met": target_met,
+        "samples": len(samples),
+        "trials": len(results),
+        "sample_dir": os.path.abspath(args.sample_dir),
+        "created": datetime.now().isoformat(timespec="seconds"),
+    }, args.output_dir, overwrite=args.force)
+    logger.info(f"Saved profile '{args.name}' to {path} "
+                f"(accuracy {best['accuracy']:.3f}, {_cost(best) * 1000:.0f}ms/sheet)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Process-pool helpers.
+
+Pass ``init_worker`` as the pool initializer so every worker imports the
+pipeline and loads its resources before the first sheet arrives, and
+use ``measure_cold_start`` (or ``python -m omr_grader.worker``) to see
+how long a fresh worker takes to become ready.
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+_startup = {}
+
+
+def init_worker(threads=1):
+    """Import the pipeline, load resources and record how long it took.
+
+    OpenCV's own thread pool is limited to ``threads`` so that N worker
+    processes do not each spawn one thread per core.
+    """
+    started = time.perf_counter()
+    import cv2
+    from . import pipeline  # noqa: F401  (imports grading and QR decoding)
+    from .resources import preload
+    imported = time.perf_counter()
+
+    cv2.setNumThreads(threads)
+    preload()
+    _startup.update(pid=os.getpid(),
+                    import_seconds=imported - started,
+                    init_seconds=time.perf_counter() - started,
+                    ready_at=time.time())
+
+
+def startup_info():
+    """Startup timings of the current worker, as recorded by ``init_worker``."""
+    return dict(_startup)
+
+
+def _report(delay):
+    time.sleep(delay)  # keeps the worker busy so the next task goes to another one
+    return startup_info()
+
+
+def measure_cold_start(workers=2, start_method="spawn"):
+    """Start a fresh pool and return the startup timings of each worker.
+
+    ``ready_after_seconds`` is measured from pool creation, so it covers
+    process and interpreter start-up as well as ``init_worker``.
+    """
+    context = multiprocessing.get_context(start_method)
+    created = time.time()
+    infos = {}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=init_worker) as pool:
+        while len(infos) < workers:
+            futures = [pool.submit(_report, 0.1) for _ in range(workers)]
+            for future in futures:
+                info = future.result()
+                infos[info["pid"]] = info
+    for info in infos.values():
+        info["ready_after_seconds"] = info.pop("ready_at") - created
+    return sorted(infos.values(), key=lambda info: info["ready_after_seconds"])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure how long a fresh grading worker takes to start.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--start-method", default="spawn",
+                        choices=multiprocessing.get_all_start_methods())
+    args = parser.parse_args()
+
+    for info in measure_cold_start(args.workers, args.start_method):
+        print(f"pid {info['pid']}: import {info['import_seconds'] * 1000:.0f}ms, "
+              f"init {info['init_seconds'] * 1000:.0f}ms, "
+              f"ready after {info['ready_after_seconds'] * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
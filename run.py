@@ -1,29 +1,30 @@
-import numpy as np
+import sys
+
 import cv2
-from detect_answer import answer_detector
-from grade_paper import ProcessPage
-from transform_image import transform_paper_image
+from omr_grader import grade_file
+
+if __name__ == "__main__":
+    image_path = sys.argv[1] if len(sys.argv) > 1 else "images/test.jpg"
 
-cv2.namedWindow('Original Image')
-cv2.namedWindow('Scanned Paper')
+    cv2.namedWindow('Original Image')
+    cv2.namedWindow('Scanned Paper')
 
-# ret, image = cap.read()
-image = cv2.imread("images\enhanced_answer_sheet (1).png")
-image, paper, biggestContour, answers, codes = answer_detector(image)
+    result = grade_file(image_path)
+    image = result.preview
 
-cv2.imshow("Scanned Paper", paper)
-cv2.imwrite("images/scanned_output.jpg", paper)
+    cv2.imshow("Scanned Paper", result.paper)
+    cv2.imwrite("images/scanned_output.jpg", result.paper)
 
-# draw the contour
-if biggestContour is not None:
-    if answers != -1:
-        cv2.drawContours(image, [biggestContour], -1, (0, 255, 0), 3)
-        print(answers)
-        if codes is not None:
-            print(codes)
-    else:
-        cv2.drawContours(image, [biggestContour], -1, (0, 0, 255), 3)
+    # draw the contour
+    if result.contour is not None:
+        if result.answers != [-1]:
+            cv2.drawContours(image, [result.contour], -1, (0, 255, 0), 3)
+            print(result.answers)
+            if result.codes != [-1]:
+                print(result.codes)
+        else:
+            cv2.drawContours(image, [result.contour], -1, (0, 0, 255), 3)
 
-cv2.imshow("Original Image", cv2.resize(image, (0, 0), fx=0.7, fy=0.7))
+    cv2.imshow("Original Image", cv2.resize(image, (0, 0), fx=0.7, fy=0.7))
 
-cv2.waitKey(0)
+    cv2.waitKey(0)
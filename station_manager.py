@@ -0,0 +1,324 @@
+import argparse
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from omr_grader import grade_image
+from omr_grader.profiles import load_profile
+
+logger = logging.getLogger(__name__)
+
+# === Configuration ===
+OUTPUT_DIR = "videos"
+FRAME_SKIP = 1
+MAX_IN_FLIGHT_PER_STREAM = 2  # frames a single stream may have queued in the pool
+IDLE_WAIT_SECONDS = 0.05
+
+PROFILE = "video"  # parameter profile name or path, see omr_grader/profile_data
+
+
+def parse_source(source):
+    """Device indices ("0", "1") open a camera, anything else is a file path."""
+    if isinstance(source, int):
+        return source
+    return int(source) if str(source).isdigit() else source
+
+
+def render_three_view(frame, frame_index, frame_size, params):
+    """Grade one frame and return (combined three-view image, transform method, answers)."""
+    frame_width, frame_height = frame_size
+    result = grade_image(frame, **params)
+    marker_preview, method = result.preview, result.method
+    cv2.putText(marker_preview, f"Transform: {method}", (10, 20),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+
+    answers, annotated_paper = result.answers, result.paper
+    if answers != [-1]:
+        for i, ans in enumerate(answers):
+            y = 30 + i * 20
+            cv2.putText(annotated_paper, f"{i+1}: {ans}", (10, y),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+
+    combined = np.hstack((
+        cv2.resize(frame, (frame_width, frame_height)),
+        cv2.resize(marker_preview, (frame_width, frame_height)),
+        cv2.resize(annotated_paper, (frame_width, frame_height)),
+    ))
+    cv2.putText(combined, f"Frame: {frame_index}", (10, frame_height - 10),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+    return combined, method, answers
+
+
+def _graded_frame(frame, frame_index, frame_size, params):
+    """Worker entry point: never raises, so one bad frame cannot stall its stream."""
+    started = time.perf_counter()
+    try:
+        combined, method, answers = render_three_view(
+            frame, frame_index, frame_size, params)
+        error = None
+    except Exception as e:
+        combined, method, answers = np.hstack((frame, frame, frame)), "error", [-1]
+        error = str(e)
+    return frame_index, combined, method, answers, error, time.perf_counter() - started
+
+
+class StreamStats:
+    """Per-stream counters; latency is measured from capture to write."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.frames_read = 0
+        self.frames_graded = 0
+        self.frames_dropped = 0
+        self.errors = 0
+        self.fallbacks = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.total_work = 0.0
+
+    def record(self, latency, work, method, error):
+        self.frames_graded += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_work += work
+        if error is not None:
+            self.errors += 1
+        elif method == "fallback":
+            self.fallbacks += 1
+
+    @property
+    def fps(self):
+        elapsed = time.perf_counter() - self.started
+        return self.frames_graded / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def mean_latency(self):
+        return self.total_latency / self.frames_graded if self.frames_graded else 0.0
+
+    def summary(self):
+        return (f"read={self.frames_read} graded={self.frames_graded} "
+                f"dropped={self.frames_dropped} fallback={self.fallbacks} "
+                f"errors={self.errors} fps={self.fps:.1f} "
+                f"latency mean={self.mean_latency * 1000:.0f}ms "
+                f"max={self.max_latency * 1000:.0f}ms")
+
+
+class CameraStream:
+    """One capture source with its own output writer and stats."""
+
+    def __init__(self, name, source, output_path, frame_skip=FRAME_SKIP):
+        self.name = name
+        self.source = parse_source(source)
+        self.output_path = output_path
+        self.frame_skip = frame_skip
+        self.is_live = isinstance(self.source, int)
+        self.cap = None
+        self.out = None
+        self.frame_size = None
+        self.frame_index = 0
+        self.finished = False
+        self._first_frame = None  # frame read while sizing the writer, graded as frame 0
+        self.pending = deque()  # (future, capture time), in frame order
+        self.stats = StreamStats()
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            raise IOError(f"[{self.name}] Cannot open capture source: {self.source}")
+
+        ret, test_frame = self.cap.read()
+        if not ret:
+            raise IOError(f"[{self.name}] Unable to read frame for resolution detection.")
+        test_frame = self._orient(test_frame)
+        self._first_frame = test_frame
+        frame_height, frame_width = test_frame.shape[:2]
+        self.frame_size = (frame_width, frame_height)
+
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        fourcc = cv2.VideoWriter_fourcc(*'XVID')
+        self.out = cv2.VideoWriter(self.output_path, fourcc, fps / self.frame_skip,
+                                   (frame_width * 3, frame_height))
+        logger.info(f"[{self.name}] {self.source} -> {self.output_path} "
+                    f"({frame_width}x{frame_height}, {fps:.1f} FPS)")
+
+    @staticmethod
+    def _orient(frame):
+        if frame.shape[1] > frame.shape[0]:
+            frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
+        return frame
+
+    def read(self):
+        """Return the next frame due for grading, or None when nothing is available."""
+        if self._first_frame is not None:
+            frame, self._first_frame = self._first_frame, None
+            self.frame_index += 1
+            self.stats.frames_read += 1
+            return 0, frame
+        while True:
+            ret, frame = self.cap.read()
+            if not ret:
+                if not self.is_live:
+                    self.finished = True
+                return None
+            index = self.frame_index
+            self.frame_index += 1
+            self.stats.frames_read += 1
+            if index % self.frame_skip == 0:
+                return index, self._orient(frame)
+
+    def skip(self):
+        """Discard one live frame so a busy camera stays current instead of lagging."""
+        if self.cap.grab():
+            self.frame_index += 1
+            self.stats.frames_read += 1
+            self.stats.frames_dropped += 1
+
+    def flush(self):
+        """Write completed frames in capture order."""
+        while self.pending and self.pending[0][0].done():
+            future, captured = self.pending.popleft()
+            frame_index, combined, method, answers, error, work = future.result()
+            self.out.write(combined)
+            self.stats.record(time.perf_counter() - captured, work, method, error)
+            if error is not None:
+                logger.error(f"[{self.name}] Error in frame {frame_index}: {error}")
+            elif method == "fallback":
+                logger.warning(f"[{self.name}] Frame {frame_index}: fallback transformation used.")
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+        if self.out is not None:
+            self.out.release()
+
+
+class StationManager:
+    """Grades several capture sources on one shared worker pool.
+
+    Streams are polled round-robin and each may only have
+    ``max_in_flight`` frames queued, so a fast camera cannot starve
+    the others. Live cameras drop frames while they are at their
+    limit; recorded videos simply wait their turn.
+    """
+
+    def __init__(self, sources, output_dir=OUTPUT_DIR, workers=None,
+                 max_in_flight=MAX_IN_FLIGHT_PER_STREAM, frame_skip=FRAME_SKIP,
+                 profile=PROFILE):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        os.makedirs(output_dir, exist_ok=True)
+        self.streams = [
+            CameraStream(f"cam{i}", source,
+                         os.path.join(output_dir, f"output_cam{i}_{timestamp}.avi"),
+                         frame_skip)
+            for i, source in enumerate(sources)
+        ]
+        self.workers = workers or min(len(self.streams) * max_in_flight, os.cpu_count() or 1)
+        self.max_in_flight = max_in_flight
+        self.params = load_profile(profile)
+        self._next = 0
+
+    def _active(self):
+        return [s for s in self.streams if not (s.finished and not s.pending)]
+
+    def _schedule(self, pool, active):
+        """Offer each stream one slot per pass, starting from a rotating position."""
+        submitted = False
+        start = self._next % len(active)
+        self._next += 1
+        for stream in active[start:] + active[:start]:
+            stream.flush()
+            if stream.finished:
+                continue
+            if len(stream.pending) >= self.max_in_flight:
+                if stream.is_live:
+                    stream.skip()
+                continue
+            item = stream.read()
+            if item is None:
+                continue
+            frame_index, frame = item
+            future = pool.submit(_graded_frame, frame, frame_index, stream.frame_size,
+                                 self.params)
+            stream.pending.append((future, time.perf_counter()))
+            submitted = True
+        return submitted
+
+    def run(self, report_every=5.0):
+        opened = []
+        for stream in self.streams:
+            try:
+                stream.open()
+                opened.append(stream)
+            except IOError as e:
+                logger.error(str(e))
+                stream.close()
+        self.streams = opened
+        if not self.streams:
+            logger.error("No capture source could be opened.")
+            return {}
+
+        logger.info(f"Grading {len(self.streams)} stream(s) on {self.workers} worker(s)")
+        last_report = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                while True:
+                    active = self._active()
+                    if not active:
+                        break
+                    if not self._schedule(pool, active):
+                        in_flight = [f for s in active for f, _ in s.pending]
+                        if in_flight:
+                            wait(in_flight, timeout=IDLE_WAIT_SECONDS,
+                                 return_when=FIRST_COMPLETED)
+                        else:
+                            time.sleep(IDLE_WAIT_SECONDS)
+
+                    if time.perf_counter() - last_report >= report_every:
+                        self.report()
+                        last_report = time.perf_counter()
+        except KeyboardInterrupt:
+            logger.info("Interrupted, flushing pending frames...")
+            for stream in self.streams:
+                for future, _ in stream.pending:
+                    future.result()
+                stream.flush()
+        finally:
+            for stream in self.streams:
+                stream.close()
+
+        self.report()
+        return {s.name: s.stats for s in self.streams}
+
+    def report(self):
+        for stream in self.streams:
+            logger.info(f"[{stream.name}] {stream.stats.summary()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Grade several cameras or recorded videos on one worker pool.")
+    parser.add_argument("sources", nargs="+",
+                        help="camera indices (0, 1, ...) or video file paths")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT_PER_STREAM)
+    parser.add_argument("--frame-skip", type=int, default=FRAME_SKIP)
+    parser.add_argument("--profile", default=PROFILE,
+                        help="parameter profile name or JSON path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    manager = StationManager(args.sources, args.output_dir, args.workers,
+                             args.max_in_flight, args.frame_skip, args.profile)
+    manager.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,7 @@ import cv2
 import numpy as np
 from PIL import Image
 from io import BytesIO
-from enhance_image import image_enhancer
-from grade_paper import ProcessPage
-from transform_image import transform_paper_image
+from omr_grader import ProcessPage, image_enhancer, transform_paper_image
 
 # App title and layout
 st.set_page_config(layout="wide")